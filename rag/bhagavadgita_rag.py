@@ -1,9 +1,9 @@
-import json
-import os
 import numpy as np
+import torch
 from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from verse_loader import load_verses
 
 class BhagavadGitaRAG:
     """
@@ -12,78 +12,62 @@ class BhagavadGitaRAG:
     and provides retrieval capabilities.
     """
     
-    def __init__(self, json_path: str, model_name: str = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'):
+    ENCODERS = ('fp32', 'int8')
+    
+    def __init__(self, json_path: str, model_name: str = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2',
+                 encoder: str = 'fp32', num_threads: Optional[int] = None):
         """
         Initialize the RAG system.
         
         Args:
             json_path: Path to the Kannada JSON file of Bhagavad Gita
             model_name: Name of the sentence transformer model to use for embeddings
+            encoder: 'fp32' for the full precision model, or 'int8' for a dynamically
+                quantized CPU version of the same model
+            num_threads: Number of CPU threads used by PyTorch for encoding. This is
+                a process-wide setting and also applies to any other instances
         """
+        if encoder not in self.ENCODERS:
+            raise ValueError(f"Unsupported encoder: {encoder}. Choose one of {self.ENCODERS}")
+        
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        
         self.json_path = json_path
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.encoder = encoder
+        self.model = self._load_model(model_name, encoder)
         self.verses = []
         self.embeddings = None
         self.load_data()
         self.create_embeddings()
     
-    def load_data(self) -> None:
-        """
-        Load the Bhagavad Gita data from JSON file.
+    def _load_model(self, model_name: str, encoder: str) -> SentenceTransformer:
         """
-        if not os.path.exists(self.json_path):
-            raise FileNotFoundError(f"JSON file not found at {self.json_path}")
-        
-        try:
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Process the data based on expected structure
-            # This might need adjustment based on the actual JSON structure
-            if isinstance(data, list):
-                self.verses = data
-            elif isinstance(data, dict) and 'verses' in data:
-                self.verses = data['verses']
-            else:
-                # Try to extract verses from the structure
-                self.verses = self._extract_verses(data)
-                
-            print(f"Loaded {len(self.verses)} verses from Bhagavad Gita")
-        except json.JSONDecodeError:
-            raise ValueError(f"Invalid JSON file at {self.json_path}")
-    
-    def _extract_verses(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Extract verses from a nested JSON structure.
+        Load the sentence transformer model for the requested encoder mode.
         
         Args:
-            data: The JSON data
+            model_name: Name of the sentence transformer model
+            encoder: Encoder mode, 'fp32' or 'int8'
             
         Returns:
-            A list of verse dictionaries
-        """
-        verses = []
-        
-        # Handle different possible structures
-        if 'chapters' in data:
-            for chapter in data['chapters']:
-                if 'verses' in chapter:
-                    for verse in chapter['verses']:
-                        verse['chapter'] = chapter.get('chapter_number', '')
-                        verses.append(verse)
-        
-        # If no verses found, try flattening the structure
-        if not verses:
-            for chapter_num, chapter_data in data.items():
-                if isinstance(chapter_data, dict) and 'verses' in chapter_data:
-                    for verse_num, verse_text in chapter_data['verses'].items():
-                        verses.append({
-                            'chapter': chapter_num,
-                            'verse': verse_num,
-                            'text': verse_text
-                        })
-        
-        return verses
+            The loaded model
+        """
+        if encoder == 'fp32':
+            return SentenceTransformer(model_name)
+        
+        # Dynamic quantization stores Linear weights as int8 and quantizes
+        # activations on the fly, which only runs on CPU
+        model = SentenceTransformer(model_name, device='cpu')
+        model.eval()
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    
+    def load_data(self) -> None:
+        """
+        Load the Bhagavad Gita data from JSON file.
+        """
+        self.verses = load_verses(self.json_path)
+        print(f"Loaded {len(self.verses)} verses from Bhagavad Gita")
     
     def create_embeddings(self) -> None:
         """
@@ -93,7 +77,19 @@ class BhagavadGitaRAG:
             print("No verses to embed")
             return
         
-        # Extract text from verses for embedding
+        texts = self._verse_texts()
+        
+        # Create embeddings
+        self.embeddings = self.model.encode(texts)
+        print(f"Created embeddings for {len(texts)} verses")
+    
+    def _verse_texts(self) -> List[str]:
+        """
+        Extract the text to embed from each verse.
+        
+        Returns:
+            A list of verse texts, in the same order as self.verses
+        """
         texts = []
         for verse in self.verses:
             if isinstance(verse, dict) and 'text' in verse:
@@ -105,9 +101,7 @@ class BhagavadGitaRAG:
                 text = self._extract_text(verse)
                 texts.append(text if text else str(verse))
         
-        # Create embeddings
-        self.embeddings = self.model.encode(texts)
-        print(f"Created embeddings for {len(texts)} verses")
+        return texts
     
     def _extract_text(self, verse: Dict[str, Any]) -> str:
         """
@@ -159,6 +153,61 @@ class BhagavadGitaRAG:
             })
         
         return results
+    
+    def check_encoder_fidelity(self, queries: Optional[List[str]] = None, top_k: int = 5) -> Dict[str, float]:
+        """
+        Compare the current encoder against the fp32 model on the loaded verses.
+        
+        Args:
+            queries: Queries used for the retrieval comparison. Defaults to the
+                verse translations of the loaded data
+            top_k: Number of top results compared for each query
+            
+        Returns:
+            Dictionary with the mean and minimum cosine agreement between verse
+            embeddings, the mean cosine agreement between query embeddings, and
+            the mean top_k overlap of the retrieved verses
+        """
+        if not self.verses or self.embeddings is None:
+            raise ValueError("No verses or embeddings available")
+        if self.encoder == 'fp32':
+            raise ValueError("Fidelity check compares against fp32 and needs a non-fp32 encoder")
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        
+        if queries is None:
+            queries = [verse['translation'] for verse in self.verses
+                       if isinstance(verse, dict) and verse.get('translation')]
+            queries = queries or self._verse_texts()
+        
+        reference = SentenceTransformer(self.model_name, device='cpu')
+        reference_embeddings = reference.encode(self._verse_texts())
+        
+        def _rowwise_cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            a = a / np.linalg.norm(a, axis=1, keepdims=True)
+            b = b / np.linalg.norm(b, axis=1, keepdims=True)
+            return np.sum(a * b, axis=1)
+        
+        corpus_agreement = _rowwise_cosine(self.embeddings, reference_embeddings)
+        
+        query_embeddings = self.model.encode(queries)
+        reference_query_embeddings = reference.encode(queries)
+        query_agreement = _rowwise_cosine(query_embeddings, reference_query_embeddings)
+        
+        # Compare the verses each encoder retrieves for the same queries
+        similarities = cosine_similarity(query_embeddings, self.embeddings)
+        reference_similarities = cosine_similarity(reference_query_embeddings, reference_embeddings)
+        top_k = min(top_k, len(self.verses))
+        top_indices = np.argsort(similarities, axis=1)[:, -top_k:]
+        reference_top_indices = np.argsort(reference_similarities, axis=1)[:, -top_k:]
+        overlaps = [len(set(a) & set(b)) / top_k for a, b in zip(top_indices, reference_top_indices)]
+        
+        return {
+            'mean_cosine': float(np.mean(corpus_agreement)),
+            'min_cosine': float(np.min(corpus_agreement)),
+            'query_mean_cosine': float(np.mean(query_agreement)),
+            'top_k_overlap': float(np.mean(overlaps)),
+        }
 
 
 def main():
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Batch export of a whole Bhagavad Gita chapter as a single audiobook file.
+
+Every verse is read as the original text followed by its translation. Clips are
+synthesized with gTTS using a bounded worker pool and cached on disk, then
+streamed one after another into a single MP3 together with a JSON index of
+chapter/verse timestamps. Interrupted runs resume from the last completed verse.
+
+Usage:
+    python export_audiobook.py bhagavadgita_Chapter_18.json -o chapter_18.mp3
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from gtts import gTTS, gTTSError
+
+from verse_loader import load_verses
+
+
+# MPEG audio Layer III tables used to compute clip durations from frame headers
+_MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+
+def _audio_offset(path: str) -> int:
+    """
+    Return the byte offset of the first audio frame, skipping any ID3v2 tag.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        return 10 + size
+    return 0
+
+
+def mp3_duration(path: str) -> float:
+    """
+    Compute the playback duration of an MP3 file by walking its frame headers.
+
+    Args:
+        path: Path to an MPEG Layer III file (as produced by gTTS)
+
+    Returns:
+        Duration in seconds
+    """
+    with open(path, 'rb') as f:
+        f.seek(_audio_offset(path))
+        data = f.read()
+
+    duration = 0.0
+    pos = 0
+    while pos + 4 <= len(data):
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+            pos += 1
+            continue
+
+        version = (b1 >> 3) & 0x03
+        layer = (b1 >> 1) & 0x03
+        bitrate_index = (b2 >> 4) & 0x0F
+        sample_rate_index = (b2 >> 2) & 0x03
+        padding = (b2 >> 1) & 0x01
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            # Not a Layer III frame header, keep scanning for sync
+            pos += 1
+            continue
+
+        table = 'mpeg1' if version == 3 else 'mpeg2'
+        bitrate = _MP3_BITRATES[table][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+        samples = 1152 if version == 3 else 576
+        frame_length = (samples // 8) * bitrate // sample_rate + padding
+
+        duration += samples / sample_rate
+        pos += frame_length
+
+    return duration
+
+
+class ChapterAudiobookExporter:
+    """
+    Synthesizes every verse of a chapter and concatenates the clips into one MP3.
+    """
+
+    def __init__(self, json_path: str, cache_dir: str = '.tts_cache',
+                 translation: str = 'kannada', max_workers: int = 4,
+                 retries: int = 3, backoff: float = 1.0):
+        """
+        Initialize the exporter.
+
+        Args:
+            json_path: Path to the Bhagavad Gita JSON file
+            cache_dir: Directory where synthesized clips are cached
+            translation: Translation to read after each verse ('kannada' or 'english')
+            max_workers: Maximum number of concurrent gTTS requests
+            retries: Number of times a failed gTTS request is retried
+            backoff: Delay in seconds before the first retry, doubled on each attempt
+        """
+        if translation not in ('kannada', 'english'):
+            raise ValueError(f"Unsupported translation: {translation}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+
+        self.json_path = os.path.abspath(json_path)
+        self.verses = load_verses(json_path)
+        self.cache_dir = cache_dir
+        self.translation = translation
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _segments(self, verse: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Return the (text, lang) pairs to read for a verse, in order.
+        """
+        segments = [(verse.get('text', ''), 'kn')]
+        if self.translation == 'english':
+            translation = verse.get('english_translation', verse.get('translation', ''))
+            segments.append((translation, 'en'))
+        else:
+            segments.append((verse.get('translation', ''), 'kn'))
+        return [(text, lang) for text, lang in segments if text]
+
+    def _clip_path(self, text: str, lang: str) -> str:
+        key = hashlib.sha1(f"{lang}\n{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def synthesize(self, text: str, lang: str) -> str:
+        """
+        Synthesize a clip, reusing the cached file when one exists.
+
+        Failed requests (e.g. rate limiting) are retried with exponential backoff.
+
+        Args:
+            text: Text to speak
+            lang: gTTS language code
+
+        Returns:
+            Path to the cached MP3 clip
+        """
+        path = self._clip_path(text, lang)
+        if os.path.exists(path):
+            return path
+
+        # Write to a temporary file first so an interrupted request never
+        # leaves a truncated clip in the cache
+        fd, tmp_path = tempfile.mkstemp(suffix='.mp3', dir=self.cache_dir)
+        os.close(fd)
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    gTTS(text=text, lang=lang, slow=False).save(tmp_path)
+                    break
+                except gTTSError:
+                    if attempt == self.retries:
+                        raise
+                    time.sleep(self.backoff * 2 ** attempt)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return path
+
+    def _synthesize_verse(self, verse: Dict[str, Any]) -> List[str]:
+        return [self.synthesize(text, lang) for text, lang in self._segments(verse)]
+
+    def _verse_keys(self) -> List[List[Any]]:
+        return [[verse.get('chapter', ''), verse.get('verse', '')] for verse in self.verses]
+
+    def _load_index(self, index_path: str) -> Dict[str, Any]:
+        """
+        Load the index of a previous run, or a fresh one if it was made from
+        different source data or settings.
+        """
+        keys = self._verse_keys()
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            done = index.get('verses', [])
+            if (index.get('source') == self.json_path
+                    and index.get('translation') == self.translation
+                    and index.get('source_verses') == keys
+                    and all([entry['chapter'], entry['verse']] == key
+                            for entry, key in zip(done, keys))
+                    and len(done) <= len(keys)):
+                return index
+        return {
+            'source': self.json_path,
+            'translation': self.translation,
+            'source_verses': keys,
+            'complete': False,
+            'verses': [],
+        }
+
+    def _save_index(self, index: Dict[str, Any], index_path: str) -> None:
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, index_path)
+
+    def export(self, output_path: str, index_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Export the chapter to a single MP3 file with a timestamp index.
+
+        The index is rewritten after every verse, so an interrupted export
+        resumes after the last verse that was fully written.
+
+        Args:
+            output_path: Path of the MP3 file to write
+            index_path: Path of the JSON index (defaults to output_path + '.json')
+
+        Returns:
+            The timestamp index
+        """
+        index_path = index_path or output_path + '.json'
+        index = self._load_index(index_path)
+        done = index['verses']
+
+        # Drop anything written after the last verse recorded in the index, and
+        # start over if the output no longer holds every recorded verse
+        byte_end = done[-1]['byte_end'] if done else 0
+        elapsed = done[-1]['end'] if done else 0.0
+        resumable = (done and os.path.exists(output_path)
+                     and os.path.getsize(output_path) >= byte_end)
+        mode = 'r+b' if resumable else 'wb'
+        if mode == 'wb':
+            index['complete'] = False
+            done.clear()
+            byte_end, elapsed = 0, 0.0
+
+        pending = self.verses[len(done):]
+        print(f"Exporting {len(pending)} of {len(self.verses)} verses to {output_path}")
+
+        # Keep synthesis at most a small window ahead of the writer
+        window = 2 * self.max_workers
+        queue = deque()
+        remaining = iter(pending)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            with open(output_path, mode) as out:
+                out.seek(byte_end)
+                out.truncate()
+
+                while True:
+                    for verse in remaining:
+                        queue.append((verse, executor.submit(self._synthesize_verse, verse)))
+                        if len(queue) >= window:
+                            break
+                    if not queue:
+                        break
+
+                    verse, future = queue.popleft()
+                    entry = {
+                        'chapter': verse.get('chapter', ''),
+                        'verse': verse.get('verse', ''),
+                        'start': round(elapsed, 3),
+                    }
+                    for i, clip_path in enumerate(future.result()):
+                        if i == 1:
+                            entry['translation_start'] = round(elapsed, 3)
+                        with open(clip_path, 'rb') as clip:
+                            clip.seek(_audio_offset(clip_path))
+                            shutil.copyfileobj(clip, out)
+                        elapsed += mp3_duration(clip_path)
+
+                    out.flush()
+                    entry['end'] = round(elapsed, 3)
+                    entry['byte_end'] = out.tell()
+                    done.append(entry)
+                    self._save_index(index, index_path)
+                    print(f"Chapter {entry['chapter']}, Verse {entry['verse']} ({entry['end']:.1f}s)")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        index['complete'] = True
+        self._save_index(index, index_path)
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Bhagavad Gita chapter as a single audiobook MP3.")
+    parser.add_argument('json_path', help="Path to the Bhagavad Gita JSON file")
+    parser.add_argument('-o', '--output', required=True, help="Output MP3 file")
+    parser.add_argument('--index', help="Output timestamp index (defaults to <output>.json)")
+    parser.add_argument('--translation', choices=['kannada', 'english'], default='kannada',
+                        help="Translation to read after each verse")
+    parser.add_argument('--cache-dir', default='.tts_cache', help="Directory for cached clips")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum concurrent TTS requests")
+    parser.add_argument('--retries', type=int, default=3, help="Retries for each failed TTS request")
+    args = parser.parse_args()
+
+    exporter = ChapterAudiobookExporter(
+        args.json_path,
+        cache_dir=args.cache_dir,
+        translation=args.translation,
+        max_workers=args.workers,
+        retries=args.retries,
+    )
+    index = exporter.export(args.output, args.index)
+    print(f"Wrote {len(index['verses'])} verses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
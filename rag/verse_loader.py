@@ -0,0 +1,67 @@
+import json
+import os
+from typing import List, Dict, Any
+
+
+def load_verses(json_path: str) -> List[Dict[str, Any]]:
+    """
+    Load the Bhagavad Gita verses from a JSON file.
+
+    Args:
+        json_path: Path to the Bhagavad Gita JSON file
+
+    Returns:
+        A list of verse dictionaries in reading order
+    """
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"JSON file not found at {json_path}")
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        raise ValueError(f"Invalid JSON file at {json_path}")
+
+    # Process the data based on expected structure
+    # This might need adjustment based on the actual JSON structure
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and 'verses' in data:
+        return data['verses']
+
+    # Try to extract verses from the structure
+    return extract_verses(data)
+
+
+def extract_verses(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract verses from a nested JSON structure.
+
+    Args:
+        data: The JSON data
+
+    Returns:
+        A list of verse dictionaries
+    """
+    verses = []
+
+    # Handle different possible structures
+    if 'chapters' in data:
+        for chapter in data['chapters']:
+            if 'verses' in chapter:
+                for verse in chapter['verses']:
+                    verse['chapter'] = chapter.get('chapter_number', '')
+                    verses.append(verse)
+
+    # If no verses found, try flattening the structure
+    if not verses:
+        for chapter_num, chapter_data in data.items():
+            if isinstance(chapter_data, dict) and 'verses' in chapter_data:
+                for verse_num, verse_text in chapter_data['verses'].items():
+                    verses.append({
+                        'chapter': chapter_num,
+                        'verse': verse_num,
+                        'text': verse_text
+                    })
+
+    return verses